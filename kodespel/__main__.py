@@ -37,7 +37,17 @@ def main():
     parser.add_option('-W', '--wordlen', type='int', default=3,
                       metavar='N',
                       help='ignore words with <= N characters')
-    parser.set_defaults(compound=True, unique=True)
+    parser.add_option('--speller', type='choice',
+                      choices=['ispell', 'aspell'],
+                      help='spell-checking program to run: ispell or aspell '
+                           '[default: %default]')
+    parser.add_option('-j', '--jobs', type='int', default=1,
+                      metavar='N',
+                      help='check up to N files in parallel [default: 1]')
+    parser.add_option('--no-cache', action='store_false', dest='cache',
+                      help='do not read or update the cache of words '
+                           'already checked by ispell')
+    parser.set_defaults(speller='ispell', compound=True, unique=True, cache=True)
     (options, args) = parser.parse_args()
     if options.list_dicts or options.dump_dict:
         if args:
@@ -49,6 +59,9 @@ def main():
         print('\n'.join(builtins.get_names()))
         sys.exit()
 
+    if options.jobs < 1:
+        parser.error('--jobs must be at least 1')
+
     if options.ignore:
         for pat in options.ignore:
             try:
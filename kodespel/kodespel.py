@@ -10,20 +10,30 @@ SOME_CONSTENT, and HTTPRepsonse are all handled correctly.
 Requires Python 3.6 or greater.
 '''
 
-import collections
+import copy
 import glob
+import hashlib
+import json
+import multiprocessing
+import multiprocessing.util
 import os
+import queue
 import re
 import subprocess
 import sys
 import tempfile
+import threading
+import time
 from typing import (
     Union, Optional,
     Iterable, Callable,
-    Dict, List, Set, IO, NamedTuple,
+    Dict, List, Set, FrozenSet, Tuple, IO, NamedTuple,
 )
 
-assert sys.hexversion >= 0x03060000, 'requires Python 3.6 or greater'
+try:
+    import fcntl
+except ImportError:                     # not on Unix
+    fcntl = None                        # type: ignore
 
 
 def warn(msg):
@@ -69,15 +79,16 @@ def determine_language(filename: str) -> Optional[str]:
         return None
 
     if stat.st_mode & 0o111:
-        file = open(filename, 'rt')
-        first_line = file.readline()
-        file.close()
-
-        if not first_line.startswith('#!'):
-            lang = None
-        elif 'python' in first_line:
+        with open(filename, 'rb') as file:
+            # Check for "#!" before reading a whole line, so we don't
+            # slurp up (and choke on) a compiled executable.
+            if file.read(2) != b'#!':
+                return None
+            first_line = file.readline()
+
+        if b'python' in first_line:
             lang = 'python'
-        elif 'perl' in first_line:
+        elif b'perl' in first_line:
             lang = 'perl'
 
     return lang
@@ -87,16 +98,52 @@ class SpellChecker:
     '''
     A wrapper for ispell.  Opens two pipes to ispell: one for writing
     (sending) words to ispell, and the other for reading reports
-    of misspelled words back from it.
+    of misspelled words back from it.  A single ispell process can
+    check any number of batches of words: check() marks the end of each
+    batch by sending a sentinel word that ispell is sure to reject.
+    A background thread reads ispell's output as soon as it is written,
+    so ispell never blocks on a full pipe while we are still sending.
+
+    aspell speaks the same pipe protocol, and can be used instead of
+    ispell by calling set_speller('aspell').
     '''
 
+    __slots__ = (
+        'speller', 'allow_compound', 'word_len', 'dictionary', 'cache',
+        'process', 'ispell_in', 'ispell_out', 'reader', 'reports',
+        'sentinel', 'total_errors',
+        'accepted', 'known', 'sent', 'cached_report',
+    )
+
+    process: 'subprocess.Popen[str]'
     ispell_in: IO[str]
     ispell_out: IO[str]
+    reader: threading.Thread
+    # a report per batch, then None at EOF (or the reader's exception)
+    reports: 'queue.Queue[Union[List[Tuple[str, List[str]]], Exception, None]]'
+    sentinel: str
+    cache: Optional['WordCache']
+    accepted: FrozenSet[str]
+    known: Dict[str, Optional[List[str]]]
+    sent: List[str]
+    cached_report: List[Tuple[str, List[str]]]
+
+    # Number of words written to ispell in a single write() call by
+    # send_words(). Batching keeps the number of pipe syscalls (and
+    # context switches to and from ispell) independent of the number of
+    # words checked.
+    batch_size = 1000
 
     def __init__(self):
+        self.speller = 'ispell'
         self.allow_compound = None
         self.word_len = None
         self.dictionary = None
+        self.cache = None
+
+    def set_speller(self, speller: str):
+        '''set the spell-checking program to run (ispell or aspell)'''
+        self.speller = speller
 
     def set_dictionary(self, dictionary):
         self.dictionary = dictionary
@@ -107,26 +154,52 @@ class SpellChecker:
     def set_word_len(self, word_len):
         self.word_len = word_len
 
-    def open(self):
+    def set_cache(self, cache: Optional['WordCache']):
+        '''
+        set the cache of verdicts from earlier runs (ispell only: see
+        _make_checker())
+        '''
+        self.cache = cache
+
+    def _command(self) -> Tuple[List[str], List[str]]:
+        '''
+        Return (cmd, options): the command line to run ispell (or
+        aspell), and the options in it that affect its verdicts (i.e.
+        all but the name of our dictionary).
+        '''
+        if self.speller == 'aspell':
+            cmd = ['aspell', '-a', '--encoding=utf-8']
+            if self.allow_compound:
+                cmd.append('--run-together')
+            if self.word_len is not None:
+                cmd.append('--ignore=%d' % self.word_len)
+            return (cmd, list(cmd))
+
         cmd = ['ispell', '-a']
         if self.allow_compound:
             cmd.append('-C')
         if self.word_len is not None:
             cmd.append('-W%d' % self.word_len)
+        options = list(cmd)
         if self.dictionary:
             cmd.extend(['-p', self.dictionary])
+        return (cmd, options)
 
+    def open(self):
+        (cmd, options) = self._command()
         try:
             pipe = subprocess.Popen(cmd,
                                     stdin=subprocess.PIPE,
                                     stdout=subprocess.PIPE,
                                     close_fds=True,
+                                    bufsize=65536,
                                     encoding='utf-8')
         except OSError as err:
             raise OSError('error executing %s: %s' % (cmd[0], err.strerror))
 
         assert pipe.stdin is not None
         assert pipe.stdout is not None
+        self.process = pipe
         self.ispell_in = pipe.stdin
         self.ispell_out = pipe.stdout
 
@@ -138,38 +211,222 @@ class SpellChecker:
         # words).
         self.ispell_in.write('!\n')
 
+        # Nonsense word that ends each batch of words: must be longer
+        # than word_len, or ispell will accept it without comment.
+        self.sentinel = 'kodespelsentinelxqz' + 'q' * (self.word_len or 0)
+
         # Total number of unique spelling errors seen.
         self.total_errors = 0
 
+        # Words in our dictionary: ispell is sure to accept them, so
+        # there's no point in sending them.
+        self.accepted = frozenset()
+        if self.dictionary:
+            with open(self.dictionary, 'rt', encoding='utf-8') as file:
+                self.accepted = frozenset(file.read().split())
+
+        # aspell can't use our dictionary as a personal word list (that
+        # needs a special header line), so instead tell it to accept
+        # each word for the rest of the session.
+        if self.speller == 'aspell':
+            self.ispell_in.write(
+                ''.join('@' + word + '\n' for word in sorted(self.accepted)))
+
+        # Words whose verdict is already known from an earlier run, the
+        # words actually sent to ispell (so we can learn their verdict
+        # in check()), and cached errors to merge into check()'s report.
+        self.known = {}
+        if self.cache is not None:
+            fingerprint = self._fingerprint(options, firstline)
+            if fingerprint is None:
+                warn("can't find ispell's master dictionary: "
+                     "not using the cache")
+                self.cache = None
+            else:
+                self.known = self.cache.get_words(fingerprint)
+        self.sent = []
+        self.cached_report = []
+
+        self.reports = queue.Queue()
+        self.reader = threading.Thread(
+            target=self._read_reports, name='ispell-reader', daemon=True)
+        self.reader.start()
+
+    def _fingerprint(self, options: List[str], version: str) -> Optional[str]:
+        '''
+        Return a string identifying everything that can affect ispell's
+        verdict on a word: its version, command-line options, master
+        dictionary (hash file), and the contents (not the name, which
+        may be a temp file) of our dictionary. Return None if the hash
+        file can't be found.
+        '''
+        hash_file = self._find_hash_file()
+        if hash_file is None:
+            return None
+        try:
+            stat = os.stat(hash_file)
+        except OSError:
+            return None
+
+        items = options + [
+            version, hash_file, str(stat.st_mtime), str(stat.st_size)]
+        digest = hashlib.sha1()
+        for item in items:
+            digest.update(item.encode('utf-8') + b'\0')
+        if self.dictionary:
+            with open(self.dictionary, 'rb') as file:
+                digest.update(file.read())
+        return digest.hexdigest()
+
+    def _find_hash_file(self) -> Optional[str]:
+        '''
+        Return the real path of the hash file that ispell uses as its
+        master dictionary, or None if it can't be found. ispell -vv
+        reports where its dictionaries live (LIBDIR) and the default
+        one (DEFHASH), which $DICTIONARY overrides. The default is often
+        a symlink (e.g. Debian's default.hash alternative): follow it,
+        so switching it changes the result.
+        '''
+        try:
+            output = subprocess.run(['ispell', '-vv'],
+                                    stdout=subprocess.PIPE,
+                                    stderr=subprocess.DEVNULL,
+                                    encoding='utf-8').stdout
+        except OSError:
+            return None
+        config = dict(re.findall(
+            r'^\s*(LIBDIR|DEFHASH) = "(.*)"$', output, re.MULTILINE))
+
+        name = os.environ.get('DICTIONARY') or config.get('DEFHASH')
+        if name is None:
+            return None
+        if '/' not in name:
+            if 'LIBDIR' not in config:
+                return None
+            name = os.path.join(config['LIBDIR'], name)
+        if not name.endswith('.hash'):
+            name += '.hash'
+        name = os.path.realpath(name)
+        if not os.path.isfile(name):
+            return None
+        return name
+
+    def _filter_known(self, words: Iterable[str]) -> Iterable[str]:
+        '''
+        Yield the words in 'words' that have to be sent to ispell.
+        Words that ispell is sure to accept are skipped, as are words
+        with a cached verdict (the misspelled ones are remembered for
+        check()).
+        '''
+        known = self.known
+        accepted = self.accepted
+        word_len = self.word_len or 0
+        for word in words:
+            if "'" in word:
+                # ispell might split words with apostrophes, so we can't
+                # predict or reliably learn its verdict: always send them.
+                yield word
+                continue
+
+            # ispell always accepts words no longer than word_len (-W),
+            # and words in our dictionary; a lowercase dictionary entry
+            # matches the word in any case.
+            if (len(word) <= word_len or
+                    word in accepted or word.lower() in accepted):
+                continue
+
+            if word not in known:
+                self.sent.append(word)
+                yield word
+                continue
+            guesses = known[word]
+            if guesses is not None:
+                self.cached_report.append((word, guesses))
+
     def close(self):
-        in_status = self.ispell_in.close()
-        out_status = self.ispell_out.close()
-        if in_status != out_status:
-            warn('huh? ispell_in status was %r, but ispell_out status was %r'
-                 % (in_status, out_status))
-        elif in_status is not None:
-            warn('ispell failed with exit status %r' % in_status)
+        try:
+            self.ispell_in.close()
+        except OSError as err:
+            # e.g. BrokenPipeError: ispell died before reading every word
+            warn('error closing pipe to %s: %s' % (self.speller, err))
+        self.reader.join()
+        self.ispell_out.close()
+        status = self.process.wait()
+        if status != 0:
+            warn('%s failed with exit status %r' % (self.speller, status))
 
     def send(self, word):
         '''Send a word to ispell to be checked.'''
-        self.ispell_in.write('^' + word + '\n')
-
-    def done_sending(self):
-        self.ispell_in.close()
+        for word in self._filter_known([word]):
+            self.ispell_in.write('^' + word + '\n')
+
+    def send_words(self, words: Iterable[str]):
+        '''Send many words to ispell, batch_size words per write.'''
+        write = self.ispell_in.write
+        batch = []
+        for word in self._filter_known(words):
+            batch.append('^' + word + '\n')
+            if len(batch) >= self.batch_size:
+                write(''.join(batch))
+                batch = []
+        if batch:
+            write(''.join(batch))
 
     def check(self):
         '''
-        Read any output available from ispell, ie. reports of misspelled
-        words sent since initialization.  Return a list of tuples
-        (bad_word, guesses) where 'guesses' is a list (possibly empty)
-        of suggested replacements for 'guesses'.
+        Return ispell's reports of misspelled words sent since the last
+        call to check() (or since initialization).  Return a list of
+        tuples (bad_word, guesses) where 'guesses' is a list (possibly
+        empty) of suggested replacements for 'guesses'.
         '''
-        report = []                     # list of (bad_word, suggestions)
-        while True:
-            line = self.ispell_out.readline()
-            if not line:
-                break
+        self.ispell_in.write('^' + self.sentinel + '\n')
+        self.ispell_in.flush()
+
+        report = self.reports.get()
+        if not isinstance(report, list):
+            self.reports.put(report)    # for any later calls
+            if report is None:
+                raise OSError('ispell exited unexpectedly')
+            raise report
+
+        if self.cache is not None:
+            self._learn(report)
+        report.extend(self.cached_report)
+        self.sent = []
+        self.cached_report = []
+        self.total_errors += len(report)
+        return report
 
+    def _read_reports(self):
+        '''
+        Body of the reader thread: parse ispell's output, and put
+        each batch's list of (bad_word, guesses) on self.reports when
+        ispell reports the sentinel word. Put None when ispell exits,
+        or the exception if its output could not be parsed, so that
+        check() never waits forever.
+        '''
+        error: Optional[Exception] = None
+        try:
+            self._parse_reports()
+        except Exception as err:
+            error = err
+        finally:
+            self.reports.put(error)
+
+        if error is not None:
+            # keep reading until ispell exits, so it never blocks on a
+            # full pipe while we are still sending
+            for line in self.ispell_out:
+                pass
+
+    def _parse_reports(self):
+        # This loop runs once per line of ispell output: keep everything
+        # it needs in local variables.
+        sentinel = self.sentinel
+        put = self.reports.put
+        report: List[Tuple[str, List[str]]] = []   # (bad_word, suggestions)
+        append = report.append
+        for line in self.ispell_out:
             code = line[0]
             extra = line[1:-1]
 
@@ -181,16 +438,179 @@ class SpellChecker:
                 # and guesses.
                 count: Union[str, int]
                 (orig, count, offset, extra) = extra.split(None, 3)
+                if orig == sentinel:
+                    put(report)
+                    report = []
+                    append = report.append
+                    continue
                 count = int(count)
                 guesses = extra.split(', ')
-                report.append((orig, guesses))
+                append((orig, guesses))
             elif code == '#':
                 # ispell has no clue
                 orig = extra.split()[0]
-                report.append((orig, []))
+                if orig == sentinel:
+                    put(report)
+                    report = []
+                    append = report.append
+                    continue
+                append((orig, []))
 
-        self.total_errors += len(report)
-        return report
+    def _learn(self, report: List[Tuple[str, List[str]]]):
+        '''record the verdict on every word sent to ispell in our cache'''
+        assert self.cache is not None
+        if not self.sent:
+            return                      # nothing new: leave the cache alone
+        bad = dict(report)
+        known = self.known
+        for word in self.sent:
+            known[word] = bad.get(word)
+        self.cache.mark_dirty()
+
+
+def default_cache_filename() -> str:
+    cache_home = os.environ.get('XDG_CACHE_HOME') or \
+        os.path.expanduser('~/.cache')
+    return os.path.join(cache_home, 'kodespel', 'words.json')
+
+
+# fingerprint -> word -> list of guesses (None if correctly spelled)
+_CacheEntries = Dict[str, Dict[str, Optional[List[str]]]]
+
+
+class WordCache:
+    '''
+    A persistent record of ispell's verdict on every word it has
+    checked, so that later runs only need to send new words to ispell.
+    Verdicts are filed under a fingerprint of the ispell options and
+    dictionary that produced them (see SpellChecker._fingerprint()).
+    Only the max_fingerprints most recently used fingerprints are kept,
+    so editing a dictionary doesn't leave dead entries around forever.
+    '''
+
+    filename: str
+    entries: _CacheEntries
+    used: Dict[str, float]              # fingerprint -> time last used
+    dirty: bool
+
+    max_fingerprints = 20
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.entries = {}
+        self.used = {}
+        self.dirty = False
+
+    def load(self):
+        '''
+        Load the cache file, if there is one. A file that can't be read
+        or doesn't look like a cache is treated as an empty cache.
+        '''
+        try:
+            with open(self.filename, 'rt', encoding='utf-8') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as err:
+            warn(f'ignoring unreadable cache {self.filename}: {err}')
+            return
+
+        parsed = self._parse(data)
+        if parsed is None:
+            warn(f'ignoring invalid cache {self.filename}')
+            return
+        (self.entries, self.used) = parsed
+
+    @staticmethod
+    def _parse(data) -> Optional[Tuple[_CacheEntries, Dict[str, float]]]:
+        if not isinstance(data, dict) or data.get('version') != 1:
+            return None
+        fingerprints = data.get('fingerprints')
+        if not isinstance(fingerprints, dict):
+            return None
+
+        entries: _CacheEntries = {}
+        used: Dict[str, float] = {}
+        for (fingerprint, entry) in fingerprints.items():
+            if not isinstance(entry, dict):
+                return None
+            last_used = entry.get('used')
+            words = entry.get('words')
+            if (not isinstance(last_used, (int, float)) or
+                    not isinstance(words, dict)):
+                return None
+            for guesses in words.values():
+                if guesses is None:
+                    continue
+                if (not isinstance(guesses, list) or
+                        not all(isinstance(guess, str) for guess in guesses)):
+                    return None
+            entries[fingerprint] = words
+            used[fingerprint] = last_used
+        return (entries, used)
+
+    def save(self):
+        if not self.dirty:
+            return
+
+        dir = os.path.dirname(self.filename)
+        try:
+            os.makedirs(dir, exist_ok=True)
+            with open(self.filename + '.lock', 'wb') as lockfile:
+                if fcntl is not None:
+                    fcntl.flock(lockfile, fcntl.LOCK_EX)
+                self._merge_and_write(dir)
+        except OSError as err:
+            warn(f'could not write cache {self.filename}: {err}')
+            return
+        self.dirty = False
+
+    def _merge_and_write(self, dir: str):
+        # Another kodespel process (e.g. a parallel worker) may have
+        # saved new words since we loaded: merge ours into theirs.
+        (my_entries, my_used) = (self.entries, self.used)
+        (self.entries, self.used) = ({}, {})
+        self.load()
+        for (fingerprint, words) in my_entries.items():
+            self.entries.setdefault(fingerprint, {}).update(words)
+            self.used[fingerprint] = max(
+                self.used.get(fingerprint, 0), my_used.get(fingerprint, 0))
+
+        # forget the least recently used fingerprints
+        keep = sorted(self.used, key=self.used.__getitem__, reverse=True)
+        for fingerprint in keep[self.max_fingerprints:]:
+            del self.entries[fingerprint]
+            del self.used[fingerprint]
+
+        data = {
+            'version': 1,
+            'fingerprints': {
+                fingerprint: {'used': self.used[fingerprint], 'words': words}
+                for (fingerprint, words) in self.entries.items()
+            },
+        }
+        tfile = tempfile.NamedTemporaryFile(
+            mode='wt', encoding='utf-8', dir=dir, prefix='words-',
+            delete=False)
+        with tfile:
+            json.dump(data, tfile, separators=(',', ':'))
+        os.replace(tfile.name, self.filename)
+
+    def get_words(self, fingerprint: str) -> Dict[str, Optional[List[str]]]:
+        '''
+        Return the (mutable) dict mapping word to list of guesses
+        (None for correctly-spelled words) for one fingerprint.
+        '''
+        # Record the use, but don't rewrite the whole cache on every run
+        # just to bump a timestamp: once a day is plenty for eviction.
+        now = time.time()
+        if now - self.used.get(fingerprint, 0) > 24 * 3600:
+            self.dirty = True
+        self.used[fingerprint] = now
+        return self.entries.setdefault(fingerprint, {})
+
+    def mark_dirty(self):
+        self.dirty = True
 
 
 class BuiltinDictionaries:
@@ -344,20 +764,32 @@ class CodeChecker:
     '''
 
     ispell: SpellChecker
+    spell_checkers: Dict[str, SpellChecker]
     unique: bool
     ignore: Callable[[str], bool]
+    ignored: Set[str]
     seen: Set[str]
 
     def __init__(self):
         self.ispell = SpellChecker()
+        self.spell_checkers = {}             # dictionary -> open ispell
         self.ignore = lambda word: False     # type: ignore
+        self.ignored = set()                 # words rejected by ignore
         self.unique = False
         self.seen = set()                    # words already checked
 
+    def close(self):
+        for ispell in self.spell_checkers.values():
+            ispell.close()
+        self.spell_checkers.clear()
+
     def get_spell_checker(self):
         '''
         Return the SpellChecker instance (wrapper around ispell)
-        that this CodeChecker will use.
+        that this CodeChecker will use. It is not opened directly, but
+        serves as the template for one ispell process per dictionary,
+        which is started when first needed and then reused for every
+        file checked with that dictionary.
         '''
         return self.ispell
 
@@ -368,27 +800,37 @@ class CodeChecker:
         if ignore:
             ignore_re = re.compile(r'|'.join(ignore), re.IGNORECASE)
             self.ignore = ignore_re.search   # type: ignore
+            self.ignored = set()
 
     # A word can match one of 3 patterns.
-    _word_re = re.compile(
-        # Case 1: a string of mixed-case letters interspersed with
-        # single apostrophes: aren't, O'Reilly, rock'n'roll. This is
-        # for regular English text in comments and strings. It's not
-        # the common case, but has to come first because of regex
-        # matching rules.
-        r'[A-Za-z]+(?:\'[A-Za-z]+)+|'
-
-        # Case 2: a string of letters, optionally capitalized; this
-        # covers almost everything: getNext, get_next, GetNext,
-        # HTTP_NOT_FOUND, HttpResponse, etc.
-        r'[A-Z]?[a-z]+|'
-
-        # Case 3: a string of uppercase letters not immediately
-        # followed by a lowercase letter. Needed for uppercase
-        # acronyms in mixed-case identifiers, eg. "HTTPResponse",
-        # "getHTTPResponse".
-        r'[A-Z]+(?![a-z])'
-    )
+    #
+    # Case 1: a string of mixed-case letters interspersed with single
+    # apostrophes: aren't, O'Reilly, rock'n'roll. This is for regular
+    # English text in comments and strings. It's not the common case,
+    # but has to come first because of regex matching rules.
+    #
+    # Case 2: a string of letters, optionally capitalized; this covers
+    # almost everything: getNext, get_next, GetNext, HTTP_NOT_FOUND,
+    # HttpResponse, etc.
+    #
+    # Case 3: a string of uppercase letters not immediately followed by
+    # a lowercase letter. Needed for uppercase acronyms in mixed-case
+    # identifiers, eg. "HTTPResponse", "getHTTPResponse".
+    #
+    # Cases 2 and 3 are factored on their first letter, so the regex
+    # engine never tries one and backtracks into the other: a lowercase
+    # letter can only start case 2, and a capital is followed either by
+    # lowercase letters (case 2) or by more capitals (case 3). This is
+    # about 15% faster than the obvious r'[A-Z]?[a-z]+|[A-Z]+(?![a-z])'.
+    _apostrophe_pattern = r"[A-Za-z]+(?:'[A-Za-z]+)+"
+    _ident_pattern = r'[a-z]+|[A-Z](?:[a-z]+|[A-Z]*(?![a-z]))'
+
+    _word_re = re.compile(_apostrophe_pattern + '|' + _ident_pattern)
+
+    # Cases 2 and 3 only. Lines without an apostrophe can't match case
+    # 1, but _word_re still tries it (and backtracks out of it) at the
+    # start of every word; skipping it speeds up splitting by about 25%.
+    _simple_word_re = re.compile(_ident_pattern)
 
     def split_line(self, line):
         '''
@@ -398,39 +840,59 @@ class CodeChecker:
         is split into
           ['match', 'pat', 'search', 'current', 'line', 'pos']
         '''
-        return self._word_re.findall(line)
+        if "'" in line:
+            return self._word_re.findall(line)
+        return self._simple_word_re.findall(line)
 
     def _extract_words(self, file: IO[str]) -> Dict[str, List[int]]:
         '''find all distinct words in file
 
         :return: dict mapping word to list of 1-based line numbers
         '''
-        locations = collections.defaultdict(list)
-        for (idx, line) in enumerate(file):
-            line_num = idx + 1
-            for word in self.split_line(line):
-                if word in self.seen:
+        locations: Dict[str, List[int]] = {}
+
+        # Most words occur many times in a file, so the common case is a
+        # word that is already in locations: test that first, and keep
+        # everything the loop needs in local variables.
+        split_line = self.split_line
+        seen = self.seen
+        ignore = self.ignore
+        ignored = self.ignored
+        unique = self.unique
+        for (line_num, line) in enumerate(file, 1):
+            for word in split_line(line):
+                line_nums = locations.get(word)
+                if line_nums is not None:
+                    if not unique:
+                        line_nums.append(line_num)
                     continue
-                if self.ignore(word):        # type: ignore
+                if word in seen or word in ignored:
                     continue
-                locations[word].append(line_num)
-                if self.unique:
-                    self.seen.add(word)
-        return dict(locations)
-
-    def _send_words(self, wordlist: Wordlist, words: Iterable[str]):
-        self.ispell.set_dictionary(wordlist.get_filename())
-        self.ispell.open()
-        for word in words:
-            self.ispell.send(word)
-        self.ispell.done_sending()
+                if ignore(word):
+                    ignored.add(word)
+                    continue
+                locations[word] = [line_num]
+                if unique:
+                    seen.add(word)
+        return locations
+
+    def _get_spell_checker(self, dictionary: str) -> SpellChecker:
+        ispell = self.spell_checkers.get(dictionary)
+        if ispell is None:
+            ispell = copy.copy(self.ispell)
+            ispell.set_dictionary(dictionary)
+            ispell.open()
+            self.spell_checkers[dictionary] = ispell
+        return ispell
 
     def _check(
-            self, locations: Dict[str, List[int]]) \
+            self, ispell: SpellChecker, locations: Dict[str, List[int]]) \
             -> List[WordError]:
         '''analyze output of ispell'''
-        errors = []
-        for (bad_word, guesses) in self.ispell.check():
+        # Bucket errors by line number rather than sorting them all:
+        # by_line[n] is the list of errors on line n (or None).
+        by_line: List[Optional[List[WordError]]] = []
+        for (bad_word, guesses) in ispell.check():
             # ispell accepts "JSON" but not "json": swallow errors that
             # are only wrong because of case mismatch.
             guesses_lower = [guess.lower() for guess in guesses]
@@ -438,18 +900,42 @@ class CodeChecker:
                 continue
 
             line_nums = locations[bad_word]
+            if line_nums[-1] >= len(by_line):
+                by_line.extend([None] * (line_nums[-1] + 1 - len(by_line)))
             for line_num in line_nums:
-                errors.append(WordError(line_num, bad_word, guesses))
+                word_error = WordError(line_num, bad_word, guesses)
+                bucket = by_line[line_num]
+                if bucket is None:
+                    by_line[line_num] = [word_error]
+                else:
+                    bucket.append(word_error)
 
-        errors.sort()                   # sort on line number
+        errors = []
+        for bucket in by_line:
+            if bucket is not None:
+                bucket.sort()           # several errors on one line
+                errors.extend(bucket)
         return errors
 
     def check_file(self, filename: str, wordlist: Wordlist) -> Iterable[FileReport]:
         '''Spell-check a single file. Yield a sequence of FileReport.'''
-        with open(filename, 'rt') as infile:
+        # Words are made of ASCII letters only, so the real encoding of
+        # the file doesn't matter as long as ASCII bytes decode to ASCII
+        # characters. latin-1 does that, is the cheapest decoder there is,
+        # and never fails (unlike UTF-8 on a file in some other encoding).
+        with open(filename, 'rt', encoding='latin-1') as infile:
             locations = self._extract_words(infile)
-            self._send_words(wordlist, locations)
-        errors = self._check(locations)
+        dictionary = wordlist.get_filename()
+        ispell = self._get_spell_checker(dictionary)
+        try:
+            ispell.send_words(locations)
+            errors = self._check(ispell, locations)
+        except Exception:
+            # ispell died (or wrote nonsense): don't reuse it, so the
+            # next file with this dictionary gets a fresh ispell
+            del self.spell_checkers[dictionary]
+            ispell.close()
+            raise
         if errors:
             report = FileReport(filename, errors)
             yield report
@@ -467,30 +953,143 @@ def check_inputs(
         cache: WordlistCache,
         base_wordlist: Wordlist) -> Iterable[FileReport]:
 
+    # the wordlist for each language, so we only look it up (and build
+    # its dictionary file) once, not once per file
+    wordlists: Dict[Optional[str], Wordlist] = {}
+
+    def find_tasks() -> Iterable[Tuple[str, Wordlist]]:
+        for filename in find_files(inputs):
+            lang = determine_language(filename)
+            wordlist = wordlists.get(lang)
+            if wordlist is None:
+                if lang is not None:
+                    wordlist = cache.get_wordlist(dictionaries + [lang])
+                else:
+                    wordlist = base_wordlist
+                wordlists[lang] = wordlist
+
+                # make sure any temp file is created (and later removed)
+                # by this process, not by a worker process
+                wordlist.get_filename()
+            yield (filename, wordlist)
+
+    if options.jobs > 1:
+        results = _check_files_parallel(options, find_tasks())
+    else:
+        results = _check_files_serial(options, find_tasks())
+
+    # Every worker process has its own CodeChecker, so with --unique
+    # the same misspelling can be reported by several workers. Results
+    # arrive in input order, so keeping only the first report of each
+    # word gives the same result as checking serially.
+    reported: Set[str] = set()
+    unique = options.unique and options.jobs > 1
+
+    errors = []
+    for (filename, reports, err) in results:
+        if err is not None:
+            error('%s: %s' % (filename, err.strerror or err))
+            errors.append(filename)
+            continue
+        for report in reports:
+            if unique:
+                report.errors = [
+                    err for err in report.errors if err.word not in reported]
+                reported.update(err.word for err in report.errors)
+                if not report.errors:
+                    continue
+            yield report
+
+    if errors:
+        raise BadInputs(errors)
+
+
+# (filename, reports, err): err is None unless the file could not be
+# read or checked (e.g. because ispell could not be run)
+_FileResult = Tuple[str, List[FileReport], Optional[OSError]]
+
+
+def _make_checker(options) -> Tuple[CodeChecker, Optional[WordCache]]:
     checker = CodeChecker()
     checker.set_unique(options.unique)
     checker.set_ignore(options.ignore)
     ispell = checker.get_spell_checker()
+    ispell.set_speller(options.speller)
     ispell.set_allow_compound(options.compound)
     ispell.set_word_len(options.wordlen)
 
-    errors = []
-    for filename in find_files(inputs):
-        lang = determine_language(filename)
-        if lang is not None:
-            wordlist = cache.get_wordlist(dictionaries + [lang])
-        else:
-            wordlist = base_wordlist
+    # aspell's verdicts also depend on its master dictionary (from LANG
+    # or its config files) and on the user's personal word list, so a
+    # fingerprint of our options can't identify them: don't cache them.
+    word_cache = None
+    if options.cache and options.speller == 'ispell':
+        word_cache = WordCache(default_cache_filename())
+        word_cache.load()
+        ispell.set_cache(word_cache)
+    return (checker, word_cache)
 
-        try:
-            for report in checker.check_file(filename, wordlist):
-                yield report
-        except IOError as err:
-            error('%s: %s' % (filename, err.strerror))
-            errors.append(filename)
 
-    if errors:
-        raise BadInputs(errors)
+def _close_checker(checker: CodeChecker, word_cache: Optional[WordCache]):
+    checker.close()
+    if word_cache is not None:
+        word_cache.save()
+
+
+def _check_file(
+        checker: CodeChecker, filename: str, wordlist: Wordlist) -> _FileResult:
+    try:
+        return (filename, list(checker.check_file(filename, wordlist)), None)
+    except OSError as err:
+        return (filename, [], err)
+
+
+def _check_files_serial(
+        options,
+        tasks: Iterable[Tuple[str, Wordlist]]) -> Iterable[_FileResult]:
+    (checker, word_cache) = _make_checker(options)
+    try:
+        for (filename, wordlist) in tasks:
+            yield _check_file(checker, filename, wordlist)
+    finally:
+        _close_checker(checker, word_cache)
+
+
+# The CodeChecker used by each worker process of _check_files_parallel(),
+# created once by _init_worker() and reused for every file that worker
+# checks (so each worker starts one ispell per dictionary, not per file).
+_worker_checker: Optional[CodeChecker] = None
+
+
+def _init_worker(options):
+    global _worker_checker
+    (_worker_checker, word_cache) = _make_checker(options)
+    # runs when the worker exits after Pool.close()
+    multiprocessing.util.Finalize(
+        None, _close_checker, args=(_worker_checker, word_cache),
+        exitpriority=0)
+
+
+def _check_file_in_worker(task: Tuple[str, Wordlist]) -> _FileResult:
+    assert _worker_checker is not None
+    (filename, wordlist) = task
+    return _check_file(_worker_checker, filename, wordlist)
+
+
+def _check_files_parallel(
+        options,
+        tasks: Iterable[Tuple[str, Wordlist]]) -> Iterable[_FileResult]:
+    pool = multiprocessing.Pool(options.jobs, _init_worker, (options,))
+    try:
+        # imap() rather than imap_unordered(): results (and hence
+        # kodespel's output) come back in the same order as serially.
+        yield from pool.imap(_check_file_in_worker, tasks)
+    except BaseException:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
 
 
 def find_files(inputs: List[str]) -> Iterable[str]:
@@ -1,5 +1,9 @@
+import io
+import optparse
 import os
 
+import pytest
+
 from kodespel import kodespel
 
 
@@ -8,6 +12,7 @@ def test_determine_language():
         ('file1.py', 'python'),
         ('script1', 'python'),
         ('script2', None),
+        ('binary1', None),
         ('does_not_exist', None),
     ]
     for basename, expect_language in tests:
@@ -34,6 +39,10 @@ class TestCodeChecker:
                 'HTTPResponse getXMLElement',
                 ['HTTP', 'Response', 'get', 'XML', 'Element']
             ),
+            (
+                'getHTTP ABc A xY',
+                ['get', 'HTTP', 'A', 'Bc', 'A', 'x', 'Y']
+            ),
             (
                 "args.reps = float('+inf')",
                 ['args', 'reps', 'float', 'inf']
@@ -54,3 +63,400 @@ class TestCodeChecker:
 
         for (input, expect) in tests:
             assert checker.split_line(input) == expect
+
+    def test_extract_words(self):
+        source = (
+            'def get_value(self):\n'
+            '    value = self.value  # get value\n'
+            '    return value\n'
+        )
+
+        checker = kodespel.CodeChecker()
+        locations = checker._extract_words(io.StringIO(source))
+        assert locations == {
+            'def': [1],
+            'get': [1, 2],
+            'value': [1, 2, 2, 2, 3],
+            'self': [1, 2],
+            'return': [3],
+        }
+
+        checker.set_unique(True)
+        checker.set_ignore(['^s', 'urn$'])
+        locations = checker._extract_words(io.StringIO(source))
+        assert locations == {'def': [1], 'get': [1], 'value': [1]}
+
+        # unique words are only reported in the first file they occur in
+        locations = checker._extract_words(io.StringIO(source))
+        assert locations == {}
+
+
+def test_code_checker_reuses_ispell(fake_ispell, tmp_path):
+    dict_file = str(tmp_path / 'words.dict')
+    file1 = str(tmp_path / 'file1.py')
+    file2 = str(tmp_path / 'file2.py')
+    with open(dict_file, 'w') as file:
+        file.write('kodespel\n')
+    with open(file1, 'w') as file:
+        file.write('def get_wrold(self):\n    return kodespel\n')
+    with open(file2, 'w') as file:
+        file.write('import kodespel\n\nprint(helo, wrold)\n')
+
+    wordlist = kodespel.Wordlist(kodespel.BuiltinDictionaries(), [dict_file])
+    checker = kodespel.CodeChecker()
+    checker.get_spell_checker().set_word_len(3)
+    try:
+        reports = (list(checker.check_file(file1, wordlist)) +
+                   list(checker.check_file(file2, wordlist)))
+        assert [(report.filename, report.errors) for report in reports] == [
+            (file1, [kodespel.WordError(1, 'wrold', ['world'])]),
+            (file2, [kodespel.WordError(3, 'helo', []),
+                     kodespel.WordError(3, 'wrold', ['world'])]),
+        ]
+
+        # both files were checked by the same ispell process
+        assert list(checker.spell_checkers) == [dict_file]
+    finally:
+        checker.close()
+    assert checker.spell_checkers == {}
+
+
+def test_spell_checker_command():
+    ispell = kodespel.SpellChecker()
+    ispell.set_allow_compound(True)
+    ispell.set_word_len(3)
+    ispell.set_dictionary('/tmp/words.dict')
+    assert ispell._command() == (
+        ['ispell', '-a', '-C', '-W3', '-p', '/tmp/words.dict'],
+        ['ispell', '-a', '-C', '-W3'],
+    )
+
+    # aspell gets the dictionary words one at a time, not with -p
+    ispell.set_speller('aspell')
+    cmd = ['aspell', '-a', '--encoding=utf-8', '--run-together', '--ignore=3']
+    assert ispell._command() == (cmd, cmd)
+
+    ispell.set_allow_compound(False)
+    ispell.set_word_len(None)
+    cmd = ['aspell', '-a', '--encoding=utf-8']
+    assert ispell._command() == (cmd, cmd)
+
+
+def test_make_checker_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    (checker, word_cache) = kodespel._make_checker(make_options(cache=True))
+    assert word_cache is not None
+    assert checker.get_spell_checker().cache is word_cache
+
+    # aspell's verdicts can't be fingerprinted, so they aren't cached
+    (checker, word_cache) = kodespel._make_checker(
+        make_options(cache=True, speller='aspell'))
+    assert word_cache is None
+    assert checker.get_spell_checker().cache is None
+
+
+def test_spell_checker_fingerprint(fake_ispell, tmp_path, monkeypatch, capsys):
+    ispell = kodespel.SpellChecker()
+    fake_hash = os.path.join(os.path.dirname(__file__), 'data', 'bin', 'fake.hash')
+    assert ispell._find_hash_file() == os.path.realpath(fake_hash)
+
+    # $DICTIONARY picks another hash file, here through a symlink like
+    # Debian's default.hash
+    for name in ['american', 'british']:
+        (tmp_path / f'{name}.hash').write_text(name)
+    default = tmp_path / 'default.hash'
+    default.symlink_to('british.hash')
+    monkeypatch.setenv('DICTIONARY', str(tmp_path / 'default'))
+    assert ispell._find_hash_file() == \
+        os.path.realpath(tmp_path / 'british.hash')
+
+    options = ['ispell', '-a']
+    fingerprint = ispell._fingerprint(options, 'version')
+    assert fingerprint is not None
+    assert ispell._fingerprint(options, 'version') == fingerprint
+
+    # switching or upgrading the master dictionary changes the fingerprint
+    default.unlink()
+    default.symlink_to('american.hash')
+    assert ispell._fingerprint(options, 'version') != fingerprint
+    default.unlink()
+    default.symlink_to('british.hash')
+    assert ispell._fingerprint(options, 'version') == fingerprint
+    (tmp_path / 'british.hash').write_text('british, upgraded')
+    assert ispell._fingerprint(options, 'version') != fingerprint
+
+    # no hash file, no fingerprint: don't use the cache rather than guess
+    monkeypatch.setenv('DICTIONARY', 'nosuchdict')
+    assert ispell._fingerprint(options, 'version') is None
+    ispell.set_cache(kodespel.WordCache(str(tmp_path / 'words.json')))
+    ispell.open()
+    ispell.close()
+    assert ispell.cache is None
+    assert 'not using the cache' in capsys.readouterr().err
+
+
+def test_code_checker_aspell(tmp_path, monkeypatch):
+    # aspell speaks the same protocol, so the fake ispell can play it
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    (bin_dir / 'aspell').symlink_to(
+        os.path.join(os.path.dirname(__file__), 'data', 'bin', 'ispell'))
+    monkeypatch.setenv('PATH', str(bin_dir) + os.pathsep + os.environ['PATH'])
+
+    dict_file = str(tmp_path / 'words.dict')
+    with open(dict_file, 'w') as file:
+        file.write('kodespel\nfrobnicate\n')
+    (file1, file2) = write_files(tmp_path, [
+        'import kodespel\nprint(wrold)\n',
+        'frobnicate(helo)\n',
+    ])
+    wordlist = kodespel.Wordlist(kodespel.BuiltinDictionaries(), [dict_file])
+    checker = kodespel.CodeChecker()
+    checker.get_spell_checker().set_speller('aspell')
+    checker.get_spell_checker().set_word_len(3)
+    try:
+        reports = (list(checker.check_file(file1, wordlist)) +
+                   list(checker.check_file(file2, wordlist)))
+        assert [(report.filename, report.errors) for report in reports] == [
+            (file1, [kodespel.WordError(2, 'wrold', ['world'])]),
+            (file2, [kodespel.WordError(1, 'helo', [])]),
+        ]
+
+        ispell = checker.spell_checkers[dict_file]
+        assert ispell.process.args == [
+            'aspell', '-a', '--encoding=utf-8', '--ignore=3']
+
+        # kodespel doesn't normally send dictionary words at all, but
+        # aspell accepts them: they were sent as "@word" when it started
+        ispell.accepted = frozenset()
+        ispell.send_words(['kodespel', 'Frobnicate', 'wrold'])
+        assert ispell.check() == [('wrold', ['world'])]
+    finally:
+        checker.close()
+
+
+def test_spell_checker_filter_known():
+    ispell = kodespel.SpellChecker()
+    ispell.set_word_len(3)
+    ispell.accepted = frozenset(['argv', 'Linux'])
+    ispell.known = {'hello': None, 'wrold': ['world']}
+    ispell.sent = []
+    ispell.cached_report = []
+
+    words = [
+        'get', 'argv', 'ARGV', 'Linux', 'linux',
+        'hello', 'wrold', 'speling', "aren't",
+    ]
+    assert list(ispell._filter_known(words)) == ['linux', 'speling', "aren't"]
+    assert ispell.sent == ['linux', 'speling']
+    assert ispell.cached_report == [('wrold', ['world'])]
+
+
+@pytest.fixture
+def fake_ispell(monkeypatch):
+    '''put tests/data/bin/ispell (a fake "ispell -a") first on PATH'''
+    bin_dir = os.path.join(os.path.dirname(__file__), 'data', 'bin')
+    monkeypatch.setenv('PATH', bin_dir + os.pathsep + os.environ['PATH'])
+
+
+def test_spell_checker(fake_ispell):
+    ispell = kodespel.SpellChecker()
+    ispell.set_word_len(3)
+    ispell.open()
+    try:
+        # each call to check() returns the errors in one batch of words
+        ispell.send_words(['hello', 'wrold', 'speling', 'foo'])
+        assert ispell.check() == [('wrold', ['world']), ('speling', [])]
+        ispell.send('world')
+        assert ispell.check() == []
+        assert ispell.check() == []
+        ispell.send_words(['Wrold', 'helo'])
+        assert ispell.check() == [('Wrold', ['world']), ('helo', [])]
+        assert ispell.total_errors == 4
+    finally:
+        ispell.close()
+
+
+def test_spell_checker_bad_output(fake_ispell):
+    ispell = kodespel.SpellChecker()
+    ispell.open()
+    try:
+        # the reader thread can't parse the report, so check() re-raises
+        # its exception rather than waiting forever
+        ispell.send('garbagereport')
+        with pytest.raises(ValueError):
+            ispell.check()
+        with pytest.raises(ValueError):
+            ispell.check()
+    finally:
+        ispell.close()
+
+
+def test_spell_checker_died(fake_ispell, capsys):
+    ispell = kodespel.SpellChecker()
+    ispell.open()
+    ispell.send('crashnow')
+    with pytest.raises(OSError, match='exited unexpectedly'):
+        ispell.check()
+
+    # not flushed until close(), which gets a broken pipe: warn, don't raise
+    ispell.send('speling')
+    ispell.close()
+    err = capsys.readouterr().err
+    assert 'error closing pipe to ispell' in err
+    assert 'ispell failed with exit status 1' in err
+
+
+def test_word_cache(tmp_path):
+    filename = str(tmp_path / 'cache' / 'words.json')
+    cache = kodespel.WordCache(filename)
+    cache.load()
+    words = cache.get_words('abc')
+    assert words == {}
+    words['hello'] = None
+    words['wrold'] = ['world']
+    cache.mark_dirty()
+    cache.save()
+
+    cache = kodespel.WordCache(filename)
+    cache.load()
+    assert cache.get_words('abc') == {'hello': None, 'wrold': ['world']}
+    assert cache.get_words('def') == {}
+
+
+def test_word_cache_invalid(tmp_path, capsys):
+    filename = tmp_path / 'words.json'
+    contents = [
+        b'\x80\x04cnosuchmod\nX\n.',              # a pickle
+        b'{"version": 1, "fingerprints": {',       # truncated
+        b'{"version": 1, "fingerprints": {"abc": {"used": 1, "words": []}}}',
+        b'{"version": 1, "fingerprints": '
+        b'{"abc": {"used": 1, "words": {"wrold": [42]}}}}',
+        b'["wrold"]',
+    ]
+    for content in contents:
+        filename.write_bytes(content)
+        cache = kodespel.WordCache(str(filename))
+        cache.load()
+        assert cache.entries == {}, content
+        assert 'ignoring' in capsys.readouterr().err
+
+
+def test_word_cache_evict(tmp_path):
+    filename = str(tmp_path / 'words.json')
+    for fingerprint in ['a', 'b', 'c', 'd']:
+        cache = kodespel.WordCache(filename)
+        cache.max_fingerprints = 3
+        cache.load()
+        cache.get_words(fingerprint)['word'] = None
+        cache.mark_dirty()
+        cache.save()
+
+    cache = kodespel.WordCache(filename)
+    cache.load()
+    assert sorted(cache.entries) == ['b', 'c', 'd']
+
+
+def make_options(**options):
+    defaults = dict(
+        unique=True, ignore=[], compound=True, wordlen=3, cache=False,
+        jobs=1, speller='ispell')
+    return optparse.Values(dict(defaults, **options))
+
+
+def check_inputs(inputs, **options):
+    values = make_options(**options)
+    cache = kodespel.WordlistCache(kodespel.BuiltinDictionaries())
+    try:
+        base_wordlist = cache.get_wordlist(['base'])
+        yield from kodespel.check_inputs(
+            values, ['base'], inputs, cache, base_wordlist)
+    finally:
+        cache.close()
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_check_inputs_no_ispell(tmp_path, monkeypatch, capsys, jobs):
+    filename = str(tmp_path / 'file.py')
+    with open(filename, 'w') as file:
+        file.write('speling = 1\n')
+    monkeypatch.setenv('PATH', str(tmp_path))
+
+    with pytest.raises(kodespel.BadInputs) as info:
+        list(check_inputs([filename], jobs=jobs))
+    assert info.value.filenames == [filename]
+    assert 'error executing ispell' in capsys.readouterr().err
+
+
+def write_files(dir, contents):
+    filenames = []
+    for (i, content) in enumerate(contents, 1):
+        filename = str(dir / f'file{i}.py')
+        with open(filename, 'w') as file:
+            file.write(content)
+        filenames.append(filename)
+    return filenames
+
+
+@pytest.mark.parametrize('unique', [True, False])
+def test_check_inputs_parallel(fake_ispell, tmp_path, unique):
+    filenames = write_files(tmp_path, [
+        'def get_wrold(self):\n    return wrold\n',
+        'print(helo)\n',
+        'value = helo + wrold\n',
+        'print(speling)\n',
+        'print(helo, wrold)\n',
+    ])
+
+    results = {}
+    for jobs in [1, 2]:
+        reports = list(check_inputs(filenames, jobs=jobs, unique=unique))
+        results[jobs] = [(report.filename, report.errors) for report in reports]
+    assert results[1] == results[2]
+
+    (file1, file2, file3, file4, file5) = filenames
+    if unique:
+        assert results[1] == [
+            (file1, [kodespel.WordError(1, 'wrold', ['world'])]),
+            (file2, [kodespel.WordError(1, 'helo', [])]),
+            (file4, [kodespel.WordError(1, 'speling', [])]),
+        ]
+    else:
+        assert [filename for (filename, errors) in results[1]] == filenames
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_check_inputs_ispell_died(fake_ispell, tmp_path, capsys, jobs):
+    (file1, file2) = write_files(tmp_path, ['crashnow = 1\n', 'print(helo)\n'])
+    reports = []
+    with pytest.raises(kodespel.BadInputs) as info:
+        for report in check_inputs([file1, file2], jobs=jobs):
+            reports.append(report)
+    assert info.value.filenames == [file1]
+    assert 'ispell exited unexpectedly' in capsys.readouterr().err
+
+    # the next file was checked by a fresh ispell
+    assert [(report.filename, report.errors) for report in reports] == [
+        (file2, [kodespel.WordError(1, 'helo', [])]),
+    ]
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_check_inputs_warm_cache(fake_ispell, tmp_path, monkeypatch, jobs):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    filenames = write_files(tmp_path, ['print(helo)\n', 'value = wrold\n'])
+    cache_file = kodespel.default_cache_filename()
+
+    def check():
+        reports = check_inputs(filenames, jobs=jobs, cache=True)
+        return [(report.filename, report.errors) for report in reports]
+
+    expect = check()
+    assert len(expect) == 2
+    stat = os.stat(cache_file)
+
+    # a warm run gets the same answers without rewriting the cache
+    assert check() == expect
+    new_stat = os.stat(cache_file)
+    assert (new_stat.st_ino, new_stat.st_mtime_ns) == \
+        (stat.st_ino, stat.st_mtime_ns)